@@ -5,8 +5,12 @@ from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 import math
 import json
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 import logging
 
 # Configure logging
@@ -16,6 +20,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Log overall progress every this many invoices; per-invoice detail is DEBUG
+PROGRESS_LOG_INTERVAL = 25
+
+# Smaller batches are rendered in-process; spawning workers costs more than it saves
+MIN_POOL_INVOICES = 10
+
 
 class InvoiceGeneratorConfig:
     """Handles configuration loading and path management"""
@@ -27,6 +37,7 @@ class InvoiceGeneratorConfig:
         self.config_path = config_path
         self.config = self._load_config()
         self.base_dir = Path(__file__).parent
+        self._output_paths: Dict[str, Path] = {}
         
     def _load_config(self) -> dict:
         """Load configuration from JSON file"""
@@ -45,27 +56,56 @@ class InvoiceGeneratorConfig:
         return self.base_dir / self.config['paths']['templates'] / template_name
     
     def get_output_path(self, subfolder: str = '') -> Path:
-        """Get output path, creating directory if needed"""
-        output_path = self.base_dir / self.config['paths']['output'] / subfolder
-        output_path.mkdir(parents=True, exist_ok=True)
+        """Get output path, creating directory the first time it is requested"""
+        output_path = self._output_paths.get(subfolder)
+        if output_path is None:
+            output_path = self.base_dir / self.config['paths']['output'] / subfolder
+            output_path.mkdir(parents=True, exist_ok=True)
+            self._output_paths[subfolder] = output_path
         return output_path
     
-    def get_position(self, key: str) -> Tuple[int, int]:
+    def get_position(self, key: str) -> Tuple[float, float]:
         """Get text position from config"""
-        return tuple(self.config['text_positions'][key])
+        return tuple(float(value) for value in self.config['text_positions'][key])
+
+
+class InvoiceRow(NamedTuple):
+    """A single invoice input row (fields follow DataFrameManager.INVOICE_COLUMNS)"""
+    invoice_number: object
+    invoice_date: pd.Timestamp
+    due_date: pd.Timestamp
+    po: object
+    line_description: pd.Timestamp
+    invoice_amount: float
+    vat_amount: float
+    total: float
 
 
 class DataFrameManager:
     """Manages Excel file loading and processing"""
     
+    INVOICE_COLUMNS = [
+        'Invoice Number', 'Invoice Date', 'Due Date', 'PO',
+        'Line Description', 'Invoice Amount', 'VAT Amount', 'Total'
+    ]
+    BACKUP_COLUMNS = ['Supplier Quote ref.', 'Client Ref', 'Site Name ', 'Reviewed Quote/Estimate (£)']
+    BACKUP_KEY_COLUMNS = ['Financial Month', 'PO Order No.']
+    BACKUP_CATEGORY_COLUMNS = ['Client Ref', 'Site Name ', 'Financial Month']
+    
     def __init__(self):
         self.invoice_data: Optional[pd.DataFrame] = None
         self.backup_data: Optional[pd.DataFrame] = None
+        self.backup_groups: Dict[Tuple[str, object], pd.DataFrame] = {}
     
-    def load_invoice_data(self, file_path: str) -> bool:
-        """Load invoice input Excel file"""
+    def load_invoice_data(self, file_path: str, usecols: Optional[List[str]] = None) -> bool:
+        """Load invoice input Excel file, reading only the required columns by default"""
+        if usecols is None:
+            usecols = self.INVOICE_COLUMNS
+        
         try:
-            self.invoice_data = pd.read_excel(file_path)
+            invoice_data = pd.read_excel(file_path, usecols=usecols)
+            self._downcast_integers(invoice_data)
+            self.invoice_data = invoice_data
             logger.info(f"Loaded invoice data: {len(self.invoice_data)} rows")
             return True
         except Exception as e:
@@ -73,10 +113,30 @@ class DataFrameManager:
             messagebox.showerror("Error", f"Failed to load invoice data:\n{e}")
             return False
     
-    def load_backup_data(self, file_path: str) -> bool:
-        """Load backup Excel file"""
+    def load_backup_data(self, file_path: str, usecols: Optional[List[str]] = None) -> bool:
+        """Load backup Excel file, reading only the required columns by default"""
+        if usecols is None:
+            usecols = self.BACKUP_COLUMNS + self.BACKUP_KEY_COLUMNS
+        
         try:
-            self.backup_data = pd.read_excel(file_path)
+            backup_data = pd.read_excel(file_path, usecols=usecols)
+            
+            # Format the financial month once so invoices can look up their rows directly
+            backup_data['Financial Month'] = pd.to_datetime(
+                backup_data['Financial Month'], format='%b-%y'
+            ).dt.strftime('%b-%y')
+            
+            # Shrink the frame before grouping; amounts stay float64 for currency formatting
+            self._downcast_integers(backup_data)
+            for column in self.BACKUP_CATEGORY_COLUMNS:
+                backup_data[column] = backup_data[column].astype('category')
+            
+            # Group only the selected columns so each group is materialized once
+            grouped = backup_data[self.BACKUP_COLUMNS].groupby(
+                [backup_data[column] for column in self.BACKUP_KEY_COLUMNS], sort=False, observed=True
+            )
+            self.backup_groups = {key: group for key, group in grouped}
+            self.backup_data = backup_data
             logger.info(f"Loaded backup data: {len(self.backup_data)} rows")
             return True
         except Exception as e:
@@ -84,6 +144,21 @@ class DataFrameManager:
             messagebox.showerror("Error", f"Failed to load backup data:\n{e}")
             return False
     
+    @staticmethod
+    def _downcast_integers(df: pd.DataFrame):
+        """Downcast integer columns to the smallest dtype that holds their values"""
+        for column in df.select_dtypes(include='integer').columns:
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    
+    def empty_backup_rows(self) -> pd.DataFrame:
+        """Get an empty frame used for invoices with no backup rows"""
+        return self.backup_data.iloc[:0][self.BACKUP_COLUMNS]
+    
+    def invoice_rows(self) -> List[InvoiceRow]:
+        """Get the invoice data as a list of InvoiceRow tuples"""
+        columns = self.invoice_data[self.INVOICE_COLUMNS]
+        return [InvoiceRow._make(values) for values in columns.itertuples(index=False, name=None)]
+    
     def is_ready(self) -> bool:
         """Check if both datasets are loaded"""
         return self.invoice_data is not None and self.backup_data is not None
@@ -95,237 +170,285 @@ class PDFGenerator:
     def __init__(self, config: InvoiceGeneratorConfig):
         self.config = config
         self.positions = {key: config.get_position(key) for key in config.config['text_positions']}
-    
-    def merge_pdfs_in_folders(self, folder_path1: Path, folder_path2: Path, output_pdf: Path):
-        """Merge all PDFs from two folders into a single PDF"""
-        def load_pdf_files(folder_path: Path):
-            return sorted([f for f in folder_path.glob("*.pdf")])
         
-        try:
-            pdf_files1 = load_pdf_files(folder_path1)
-            pdf_files2 = load_pdf_files(folder_path2)
-            
-            output_doc = fitz.open()
-            
-            for pdf_files in [pdf_files1, pdf_files2]:
-                for pdf_file in pdf_files:
-                    input_doc = fitz.open(pdf_file)
-                    output_doc.insert_pdf(input_doc)
-                    input_doc.close()
-            
-            output_doc.save(output_pdf)
-            output_doc.close()
-            logger.info(f"Merged PDF created: {output_pdf}")
-        except Exception as e:
-            logger.error(f"Error merging PDFs: {e}")
-            raise
+        # Positions used on every page, resolved once
+        self._pos_invoice_reference = self.positions["invoice_reference"]
+        self._pos_invoice_date = self.positions["invoice_date"]
+        self._pos_due_date = self.positions["due_date"]
+        self._pos_po = self.positions["po"]
+        self._pos_accounting_month_uno = self.positions["accounting_month_uno"]
+        self._pos_accounting_month_dos = self.positions["accounting_month_dos"]
+        self._pos_accounting_month_tres = self.positions["accounting_month_tres"]
+        self._pos_quantity = self.positions["quantity"]
+        self._pos_net_amount = self.positions["net_amount"]
+        self._pos_sub_total = self.positions["sub_total"]
+        self._pos_total = self.positions["total"]
+        self._pos_bloque_uno = self.positions["bloque_uno"]
+        self._pos_bloque_two = self.positions["bloque_two"]
+        self._pos_bloque_three = self.positions["bloque_three"]
+        self._pos_bloque_four = self.positions["bloque_four"]
+        self._pos_total_two = self.positions["total_two"]
+        
+        # Read the front template once; each invoice is opened from memory
+        self._front_bytes = config.get_template_path("front_pager.pdf").read_bytes()
+        
+        # Keep the blank template open; backup pages are copied from it with insert_pdf
+        self._blank_src = fitz.open(config.get_template_path("blank_template.pdf"))
+        
+        self._month_cache: Dict[Tuple[int, int], str] = {}
     
-    def delete_pdf_files_in_folders(self, *folder_paths: Path):
-        """Delete all PDF files in specified folders"""
-        for folder_path in folder_paths:
-            try:
-                for pdf_file in folder_path.glob("*.pdf"):
-                    pdf_file.unlink()
-                logger.info(f"Cleaned up PDFs in: {folder_path}")
-            except Exception as e:
-                logger.error(f"Error deleting PDFs in {folder_path}: {e}")
+    def close(self):
+        """Close the cached blank template document"""
+        self._blank_src.close()
     
     def format_accounting_month(self, date) -> str:
-        """Format date as accounting month (e.g., 'Jan-25')"""
-        return date.strftime('%b-%y')
+        """Format date as accounting month (e.g., 'Jan-25'), caching per month"""
+        key = (date.year, date.month)
+        month_str = self._month_cache.get(key)
+        if month_str is None:
+            month_str = date.strftime('%b-%y')
+            self._month_cache[key] = month_str
+        return month_str
     
     def calculate_vat_position(self, vat_amount: float) -> str:
         """Determine which VAT position to use based on amount"""
         vat_middle = round(vat_amount, 2)
-        vat_string = str(vat_middle)
-        parts = vat_string.split(".")
-        integ_part = parts[0]
-        integ_num = len(integ_part)
         
-        if integ_num == 5:
+        # Five characters before the decimal point: 10000-99999, or -1000 to -9999
+        if 10000 <= vat_middle < 100000 or -10000 < vat_middle <= -1000:
             return "vat_dos"
         elif 1000 < vat_middle < 2000:
             return "vat_dos"
         else:
             return "vat"
     
-    def create_front_page(self, row: pd.Series, output_path: Path):
-        """Create the front page of the invoice"""
-        template_path = self.config.get_template_path("front_pager.pdf")
+    @staticmethod
+    def _text_values(series: pd.Series) -> pd.Series:
+        """Convert column values to strings, leaving missing cells blank"""
+        values = series.astype(object)
+        return values.where(values.notna(), '').astype(str)
+    
+    @staticmethod
+    def _column_text(values) -> str:
+        """Join column values into right-aligned lines, matching DataFrame.to_string"""
+        width = max(map(len, values), default=0)
+        return "\n".join(value.rjust(width) for value in values)
+    
+    def build_invoice(self, row: InvoiceRow, page_dataframes: Iterable[pd.DataFrame]) -> bytes:
+        """Build the front page and backup pages in one document and return the PDF bytes"""
+        output_doc = fitz.open(stream=self._front_bytes, filetype="pdf")
         
         try:
-            pdf_document = fitz.open(template_path)
-            page = pdf_document[0]
+            net_amount_str = self.create_front_page(output_doc[0], row)
+            self.create_backup_pages(output_doc, page_dataframes, net_amount_str)
+            
+            # Compact and serialize in memory so the file can be written in one go
+            pdf_bytes = output_doc.tobytes(garbage=4, deflate=True, clean=True)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Built invoice PDF: {row.invoice_number} ({len(pdf_bytes)} bytes)")
+            return pdf_bytes
+        finally:
+            output_doc.close()
+    
+    def create_front_page(self, page: fitz.Page, row: InvoiceRow) -> str:
+        """Fill in the front page of the invoice"""
+        try:
+            shape = page.new_shape()
             
             # Format data
-            invoice_date_str = row['Invoice Date'].strftime('%d/%m/%Y')
-            due_date_str = row['Due Date'].strftime('%d/%m/%Y')
-            acc_month_str = self.format_accounting_month(row['Line Description'])
+            invoice_date_str = row.invoice_date.strftime('%d/%m/%Y')
+            due_date_str = row.due_date.strftime('%d/%m/%Y')
+            acc_month_str = self.format_accounting_month(row.line_description)
             
-            quantity_middle = round(row['Invoice Amount'] / 1000, 5)
+            quantity_middle = round(row.invoice_amount / 1000, 5)
             quantity_final = format(quantity_middle, '.5f').rstrip('0')
             
-            net_amount_str = f"£{row['Invoice Amount']:.2f}"
-            sub_amount_str = f"{row['Invoice Amount']:.2f}"
-            vat_amount_str = f"{row['VAT Amount']:.2f}"
-            total_amount_str = f"{row['Total']:.2f}"
+            net_amount_str = f"£{row.invoice_amount:.2f}"
+            sub_amount_str = f"{row.invoice_amount:.2f}"
+            vat_amount_str = f"{row.vat_amount:.2f}"
+            total_amount_str = f"{row.total:.2f}"
             
-            # Insert text at positions
-            page.insert_text(self.positions["invoice_reference"], str(row['Invoice Number']), fontname="helv", fontsize=8)
-            page.insert_text(self.positions["invoice_date"], invoice_date_str, fontname="helv", fontsize=8)
-            page.insert_text(self.positions["due_date"], due_date_str, fontname="helv", fontsize=8)
-            page.insert_text(self.positions["po"], str(row['PO']), fontname="helv", fontsize=8)
-            page.insert_text(self.positions["accounting_month_uno"], acc_month_str, fontname="helv", fontsize=7)
-            page.insert_text(self.positions["accounting_month_dos"], acc_month_str, fontname="helv", fontsize=7)
-            page.insert_text(self.positions["accounting_month_tres"], acc_month_str, fontname="helv", fontsize=7)
+            # Add text at positions
+            shape.insert_text(self._pos_invoice_reference, str(row.invoice_number), fontname="helv", fontsize=8)
+            shape.insert_text(self._pos_invoice_date, invoice_date_str, fontname="helv", fontsize=8)
+            shape.insert_text(self._pos_due_date, due_date_str, fontname="helv", fontsize=8)
+            shape.insert_text(self._pos_po, str(row.po), fontname="helv", fontsize=8)
+            shape.insert_text(self._pos_accounting_month_uno, acc_month_str, fontname="helv", fontsize=7)
+            shape.insert_text(self._pos_accounting_month_dos, acc_month_str, fontname="helv", fontsize=7)
+            shape.insert_text(self._pos_accounting_month_tres, acc_month_str, fontname="helv", fontsize=7)
             
             # Conditional quantity formatting
             quantity_fontsize = 6.4 if len(quantity_final) > 7 else 7
-            page.insert_text(self.positions["quantity"], quantity_final, fontname="helv", fontsize=quantity_fontsize)
+            shape.insert_text(self._pos_quantity, quantity_final, fontname="helv", fontsize=quantity_fontsize)
             
-            page.insert_text(self.positions["net_amount"], net_amount_str, fontname="helv", fontsize=7)
-            page.insert_text(self.positions["sub_total"], sub_amount_str, fontname="helv", fontsize=8)
+            shape.insert_text(self._pos_net_amount, net_amount_str, fontname="helv", fontsize=7)
+            shape.insert_text(self._pos_sub_total, sub_amount_str, fontname="helv", fontsize=8)
             
             # Conditional VAT position
-            vat_position_key = self.calculate_vat_position(row['VAT Amount'])
-            page.insert_text(self.positions[vat_position_key], vat_amount_str, fontname="helv", fontsize=8)
+            vat_position_key = self.calculate_vat_position(row.vat_amount)
+            shape.insert_text(self.positions[vat_position_key], vat_amount_str, fontname="helv", fontsize=8)
             
-            page.insert_text(self.positions["total"], total_amount_str, fontname="helv", fontsize=8)
-            
-            pdf_document.save(output_path)
-            pdf_document.close()
-            logger.info(f"Created front page: {output_path}")
+            shape.insert_text(self._pos_total, total_amount_str, fontname="helv", fontsize=8)
             
+            shape.commit()
             return net_amount_str
         except Exception as e:
             logger.error(f"Error creating front page: {e}")
             raise
     
-    def create_backup_pages(self, dataframes: list, invoice_number: str, net_amount_str: str):
-        """Create backup pages for the invoice"""
-        template_path = self.config.get_template_path("blank_template.pdf")
-        backup_folder = self.config.get_output_path("back_up")
-        
+    @staticmethod
+    def _mark_last(items: Iterable) -> Iterator[Tuple[object, bool]]:
+        """Yield (item, is_last) pairs using a single item of lookahead"""
+        iterator = iter(items)
+        current = next(iterator, None)
+        if current is None:
+            return
+        for upcoming in iterator:
+            yield current, False
+            current = upcoming
+        yield current, True
+    
+    def create_backup_pages(self, output_doc: fitz.Document, dataframes: Iterable[pd.DataFrame], net_amount_str: str):
+        """Append backup pages for the invoice to the output document"""
         max_char_limit = 30
         max_char_limit_two = 20
         
         try:
-            for i, df_page in enumerate(dataframes):
-                pdf_document = fitz.open(template_path)
-                page = pdf_document[0]
+            for i, (df_page, is_last) in enumerate(self._mark_last(dataframes)):
+                page_number = output_doc.page_count
+                output_doc.insert_pdf(self._blank_src)
+                page = output_doc[page_number]
+                shape = page.new_shape()
                 
-                # Select and format columns
-                quote_ref = df_page[['Supplier Quote ref.']].copy()
-                client_ref = df_page[['Client Ref']].copy()
-                site_name = df_page[['Site Name ']].copy()
-                reviewed_quote = df_page[['Reviewed Quote/Estimate (£)']].copy()
-                
-                # Format currency
-                reviewed_quote['Reviewed Quote/Estimate (£)'] = reviewed_quote['Reviewed Quote/Estimate (£)'].apply(
-                    lambda x: f'£{x:,.2f}'
-                )
+                # Format currency, leaving missing amounts blank like the text columns
+                amounts = df_page['Reviewed Quote/Estimate (£)']
+                reviewed_quote = [
+                    f'£{x:,.2f}' if present else ''
+                    for x, present in zip(amounts.to_numpy(), amounts.notna().to_numpy())
+                ]
                 
                 # Truncate and pad strings
-                site_name['Site Name '] = site_name['Site Name '].str.slice(0, max_char_limit).str.ljust(max_char_limit)
-                client_ref['Client Ref'] = client_ref['Client Ref'].str.slice(0, max_char_limit_two).str.ljust(max_char_limit_two)
+                site_name = self._text_values(df_page['Site Name ']).str.slice(0, max_char_limit).str.ljust(max_char_limit)
+                client_ref = self._text_values(df_page['Client Ref']).str.slice(0, max_char_limit_two).str.ljust(max_char_limit_two)
                 
                 # Convert to string format
-                text_quote_ref = quote_ref.to_string(index=False, header=False)
-                text_client_ref = client_ref.to_string(index=False, header=False)
-                text_site_name = site_name.to_string(index=False, header=False)
-                text_reviewed_quote = reviewed_quote.to_string(index=False, header=False)
+                text_quote_ref = self._column_text(self._text_values(df_page['Supplier Quote ref.']).to_numpy())
+                text_client_ref = self._column_text(client_ref.to_numpy())
+                text_site_name = self._column_text(site_name.to_numpy())
+                text_reviewed_quote = self._column_text(reviewed_quote)
                 
-                # Insert text
-                page.insert_text(self.positions["bloque_uno"], text_quote_ref, fontname="helv", fontsize=8)
-                page.insert_text(self.positions["bloque_two"], text_client_ref, fontname="helv", fontsize=8)
-                page.insert_text(self.positions["bloque_three"], text_site_name, fontname="helv", fontsize=8)
-                page.insert_text(self.positions["bloque_four"], text_reviewed_quote, fontname="helv", fontsize=8)
+                # Add text
+                shape.insert_text(self._pos_bloque_uno, text_quote_ref, fontname="helv", fontsize=8)
+                shape.insert_text(self._pos_bloque_two, text_client_ref, fontname="helv", fontsize=8)
+                shape.insert_text(self._pos_bloque_three, text_site_name, fontname="helv", fontsize=8)
+                shape.insert_text(self._pos_bloque_four, text_reviewed_quote, fontname="helv", fontsize=8)
                 
                 # Add total to last page
-                if i == len(dataframes) - 1:
-                    page.insert_text(self.positions["total_two"], net_amount_str, fontname="helv", fontsize=8)
-                    output_path = backup_folder / f"{invoice_number} - 999.pdf"
-                else:
-                    output_path = backup_folder / f"{invoice_number} - {i}.pdf"
+                if is_last:
+                    shape.insert_text(self._pos_total_two, net_amount_str, fontname="helv", fontsize=8)
                 
-                pdf_document.save(output_path)
-                pdf_document.close()
-                logger.info(f"Created backup page: {output_path}")
+                shape.commit()
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Added backup page {i + 1}")
         except Exception as e:
             logger.error(f"Error creating backup pages: {e}")
             raise
 
 
+# Per-process state for invoice rendering workers, set by _init_render_worker
+_worker_pdf_generator: Optional[PDFGenerator] = None
+_worker_backup_groups: Dict[Tuple[str, object], pd.DataFrame] = {}
+_worker_empty_backup: Optional[pd.DataFrame] = None
+
+
+def split_dataframe(df: pd.DataFrame, rows_per_page: int = 58) -> Iterator[pd.DataFrame]:
+    """Split dataframe into pages, yielding one iloc slice per page"""
+    for start in range(0, len(df), rows_per_page):
+        yield df.iloc[start:start + rows_per_page]
+
+
+def _init_render_worker(config_path: str, backup_groups: dict, empty_backup: pd.DataFrame):
+    """Set up the rendering state for the current process"""
+    global _worker_pdf_generator, _worker_backup_groups, _worker_empty_backup
+    
+    _worker_pdf_generator = PDFGenerator(InvoiceGeneratorConfig(Path(config_path)))
+    _worker_backup_groups = backup_groups
+    _worker_empty_backup = empty_backup
+
+
+def _close_render_worker():
+    """Release the rendering state for the current process"""
+    global _worker_pdf_generator, _worker_backup_groups, _worker_empty_backup
+    
+    if _worker_pdf_generator is not None:
+        _worker_pdf_generator.close()
+    _worker_pdf_generator = None
+    _worker_backup_groups = {}
+    _worker_empty_backup = None
+
+
+def _init_pool_worker(config_path: str, backup_groups: dict, empty_backup: pd.DataFrame):
+    """Set up a pool worker process, releasing its state when the process exits"""
+    _init_render_worker(config_path, backup_groups, empty_backup)
+    atexit.register(_close_render_worker)
+
+
+def _render_invoice(row: InvoiceRow) -> Tuple[bytes, pd.DataFrame]:
+    """Render a single invoice and return its PDF bytes and QT rows"""
+    try:
+        acc_month_str = _worker_pdf_generator.format_accounting_month(row.line_description)
+        
+        # Look up backup data
+        filtered_data = _worker_backup_groups.get((acc_month_str, row.po), _worker_empty_backup)
+        
+        # Split into pages
+        page_dataframes = split_dataframe(filtered_data)
+        
+        # Build front page and backup pages into the final PDF
+        pdf_bytes = _worker_pdf_generator.build_invoice(row, page_dataframes)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Successfully processed invoice: {row.invoice_number}")
+        
+        qt_rows = pd.DataFrame({
+            'Supplier Quote ref.': filtered_data['Supplier Quote ref.'].values,
+            'Invoice Number': row.invoice_number
+        })
+        return pdf_bytes, qt_rows
+    except Exception as e:
+        logger.error(f"Error processing invoice {row.invoice_number}: {e}")
+        raise
+
+
 class InvoiceProcessor:
     """Main processor for invoice generation"""
     
     def __init__(self, config: InvoiceGeneratorConfig, data_manager: DataFrameManager):
         self.config = config
         self.data_manager = data_manager
-        self.pdf_generator = PDFGenerator(config)
+        self.output_dir = config.get_output_path()
         self.qt_data = pd.DataFrame(columns=['Supplier Quote ref.', 'Invoice Number'])
+        self._qt_parts = []
     
-    def split_dataframe(self, df: pd.DataFrame, rows_per_page: int = 58) -> list:
-        """Split dataframe into pages"""
-        dataframes = []
-        current_row = 0
-        
-        while current_row < len(df):
-            page_df = df.iloc[current_row:current_row + rows_per_page]
-            dataframes.append(page_df)
-            current_row += rows_per_page
+    def _save_rendered_invoices(self, rows: List[InvoiceRow], results: Iterable[Tuple[bytes, pd.DataFrame]]):
+        """Write rendered invoice PDFs and collect their QT rows"""
+        total_invoices = len(rows)
         
-        return dataframes
-    
-    def process_single_invoice(self, row: pd.Series):
-        """Process a single invoice"""
-        try:
-            # Prepare backup data
-            backup_df = self.data_manager.backup_data.copy()
-            backup_df['Financial Month'] = pd.to_datetime(backup_df['Financial Month'], format='%b-%y')
-            backup_df['Financial Month'] = backup_df['Financial Month'].apply(self.pdf_generator.format_accounting_month)
-            
-            acc_month_str = self.pdf_generator.format_accounting_month(row['Line Description'])
-            
-            # Filter backup data
-            condition1 = backup_df['Financial Month'] == acc_month_str
-            condition2 = backup_df['PO Order No.'] == row['PO']
-            filtered_df = backup_df[condition1 & condition2]
-            
-            selected_columns = ['Supplier Quote ref.', 'Client Ref', 'Site Name ', 'Reviewed Quote/Estimate (£)']
-            filtered_data = filtered_df[selected_columns]
-            
-            # Update QT data
-            qt_temp = pd.DataFrame({
-                'Supplier Quote ref.': filtered_data['Supplier Quote ref.'],
-                'Invoice Number': row['Invoice Number']
-            })
-            self.qt_data = pd.concat([self.qt_data, qt_temp], ignore_index=True)
-            
-            # Split into pages
-            page_dataframes = self.split_dataframe(filtered_data)
-            
-            # Create front page
-            one_pager_folder = self.config.get_output_path("one_pager")
-            front_page_path = one_pager_folder / f"{row['Invoice Number']}.pdf"
-            net_amount_str = self.pdf_generator.create_front_page(row, front_page_path)
+        # A single writer thread flushes each PDF while the next result comes in;
+        # the previous write is checked before queuing another so failures stop the run early
+        pending_write = None
+        with ThreadPoolExecutor(max_workers=1) as file_writer:
+            for processed, (row, (pdf_bytes, qt_rows)) in enumerate(zip(rows, results), start=1):
+                if pending_write is not None:
+                    pending_write.result()
+                final_output = self.output_dir / f"{row.invoice_number}.pdf"
+                pending_write = file_writer.submit(final_output.write_bytes, pdf_bytes)
+                self._qt_parts.append(qt_rows)
+                if processed % PROGRESS_LOG_INTERVAL == 0 or processed == total_invoices:
+                    logger.info(f"Processed invoice {processed}/{total_invoices}")
             
-            # Create backup pages
-            self.pdf_generator.create_backup_pages(page_dataframes, row['Invoice Number'], net_amount_str)
-            
-            # Merge PDFs
-            final_output = self.config.get_output_path() / f"{row['Invoice Number']}.pdf"
-            backup_folder = self.config.get_output_path("back_up")
-            
-            self.pdf_generator.merge_pdfs_in_folders(one_pager_folder, backup_folder, final_output)
-            
-            # Clean up temporary files
-            self.pdf_generator.delete_pdf_files_in_folders(one_pager_folder, backup_folder)
-            
-            logger.info(f"Successfully processed invoice: {row['Invoice Number']}")
-        except Exception as e:
-            logger.error(f"Error processing invoice {row['Invoice Number']}: {e}")
-            raise
+            if pending_write is not None:
+                pending_write.result()
     
     def process_all_invoices(self):
         """Process all invoices in the dataset"""
@@ -337,13 +460,51 @@ class InvoiceProcessor:
             total_invoices = len(self.data_manager.invoice_data)
             logger.info(f"Starting to process {total_invoices} invoices")
             
-            for index, row in self.data_manager.invoice_data.iterrows():
-                logger.info(f"Processing invoice {index + 1}/{total_invoices}")
-                self.process_single_invoice(row)
+            # Recreate the output folder in case it was removed since the last run
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            
+            self._qt_parts = []
+            if total_invoices:
+                rows = self.data_manager.invoice_rows()
+                max_workers = min(total_invoices, os.cpu_count() or 1)
+                render_args = (
+                    str(self.config.config_path),
+                    self.data_manager.backup_groups,
+                    self.data_manager.empty_backup_rows(),
+                )
+                
+                if max_workers == 1 or total_invoices < MIN_POOL_INVOICES:
+                    # A single worker would only add startup and pickling cost
+                    _init_render_worker(*render_args)
+                    try:
+                        self._save_rendered_invoices(rows, map(_render_invoice, rows))
+                    finally:
+                        _close_render_worker()
+                else:
+                    # Render in worker processes; backup groups are sent once per worker
+                    chunksize = min(8, max(1, total_invoices // (max_workers * 4)))
+                    with ProcessPoolExecutor(
+                        max_workers=max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_pool_worker,
+                        initargs=render_args,
+                    ) as executor:
+                        results = executor.map(_render_invoice, rows, chunksize=chunksize)
+                        try:
+                            self._save_rendered_invoices(rows, results)
+                        finally:
+                            # Closing the map iterator cancels invoices not yet rendered, so a
+                            # failed write does not wait for the rest of the batch on exit
+                            results.close()
             
             # Save QT fillable data
-            qt_output_path = self.config.get_output_path() / "QT_Fillable_data.xlsx"
-            self.qt_data.to_excel(qt_output_path, index=False)
+            if self._qt_parts:
+                self.qt_data = pd.concat(self._qt_parts, ignore_index=True)
+            else:
+                self.qt_data = pd.DataFrame(columns=['Supplier Quote ref.', 'Invoice Number'])
+            qt_output_path = self.output_dir / "QT_Fillable_data.xlsx"
+            with pd.ExcelWriter(qt_output_path, engine='xlsxwriter') as excel_writer:
+                self.qt_data.to_excel(excel_writer, index=False)
             logger.info(f"QT fillable data saved to: {qt_output_path}")
             
             return True
@@ -17,8 +17,6 @@ def create_directory_structure():
     directories = [
         base_dir / "templates",
         base_dir / "output",
-        base_dir / "output" / "one_pager",
-        base_dir / "output" / "back_up",
     ]
     
     print("Creating directory structure...")
@@ -37,7 +35,8 @@ def check_dependencies():
         'fitz': 'PyMuPDF',
         'pandas': 'pandas',
         'PIL': 'Pillow',
-        'openpyxl': 'openpyxl'
+        'openpyxl': 'openpyxl',
+        'xlsxwriter': 'XlsxWriter'
     }
     
     missing_packages = []